@@ -16,8 +16,10 @@ import torch as th
 import yaml
 from gymnasium import spaces
 from huggingface_sb3 import EnvironmentName
-from optuna.pruners import BasePruner, MedianPruner, NopPruner, SuccessiveHalvingPruner
-from optuna.samplers import BaseSampler, RandomSampler, TPESampler, GPSampler
+from optuna.pruners import BasePruner, HyperbandPruner, MedianPruner, NopPruner, SuccessiveHalvingPruner
+from optuna.samplers import BaseSampler, RandomSampler, GPSampler
+from optuna.storages import JournalStorage
+from optuna.storages.journal import JournalFileBackend
 from optuna.study import MaxTrialsCallback
 from optuna.trial import TrialState
 from optuna.visualization import plot_optimization_history, plot_param_importances
@@ -48,7 +50,7 @@ from torch import nn as nn
 # Register custom envs
 import rl_zoo3.import_envs  # noqa: F401
 from rl_zoo3.callbacks import SaveVecNormalizeCallback, TrialEvalCallback
-from rl_zoo3.hyperparams_opt import HYPERPARAMS_SAMPLER
+from rl_zoo3.hyperparams_opt import PRUNER_REPORT_EVERY_STEPS, get_sampler, make_sampler
 from rl_zoo3.utils import ALGOS, get_callback_list, get_class_by_name, get_latest_run_id, get_wrapper_class, linear_schedule
 
 
@@ -395,10 +397,10 @@ class ExperimentManager:
         # TODO n evaluations during hyperparameter optimization of pruning
         # Derive n_evaluations from number of timesteps if needed
         if self.n_evaluations is None and self.optimize_hyperparameters:
-            self.n_evaluations = max(1, self.n_timesteps // int(1e5))
+            self.n_evaluations = max(1, self.n_timesteps // PRUNER_REPORT_EVERY_STEPS)
             print(
                 f"Doing {self.n_evaluations} intermediate evaluations for pruning based on the number of timesteps."
-                " (1 evaluation every 100k timesteps)"
+                f" (1 evaluation of the mean reward every {PRUNER_REPORT_EVERY_STEPS} timesteps)"
             )
 
         # Pre-process normalize config
@@ -706,8 +708,8 @@ class ExperimentManager:
         # n_warmup_steps: Disable pruner until the trial reaches the given number of steps.
         if sampler_method == "random":
             sampler: BaseSampler = RandomSampler(seed=self.seed)
-        elif sampler_method == "tpe:":
-            sampler = TPESampler(n_startup_trials=self.n_startup_trials, seed=self.seed, multivariate=True)
+        elif sampler_method == "tpe":
+            sampler = make_sampler(n_startup_trials=self.n_startup_trials, seed=self.seed)
         elif sampler_method == "gp":
             sampler = GPSampler(seed=self.seed, n_startup_trials=5)
         elif sampler_method == "skopt":
@@ -726,6 +728,9 @@ class ExperimentManager:
             pruner: BasePruner = SuccessiveHalvingPruner(min_resource=1, reduction_factor=4, min_early_stopping_rate=0)
         elif pruner_method == "median":
             pruner = MedianPruner(n_startup_trials=self.n_startup_trials, n_warmup_steps=self.n_evaluations // 3)
+        elif pruner_method == "hyperband":
+            # the resource is the number of intermediate evaluations
+            pruner = HyperbandPruner(min_resource=1, max_resource=self.n_evaluations, reduction_factor=3)
         elif pruner_method == "none":
             # Do not prune
             pruner = NopPruner()
@@ -745,7 +750,7 @@ class ExperimentManager:
         # Pass n_actions to initialize DDPG/TD3 noise sampler
         # Sample candidate hyperparameters
         # TODO here the sampled hyperaparamters are set
-        sampled_hyperparams = HYPERPARAMS_SAMPLER[self.algo](trial, self.n_actions, n_envs, additional_args)
+        sampled_hyperparams = get_sampler(self.algo)(trial, self.n_actions, n_envs, additional_args)
         kwargs.update(sampled_hyperparams)
 
         env = self.create_envs(n_envs, no_log=True)
@@ -839,6 +844,12 @@ class ExperimentManager:
                 "when you want to do distributed hyperparameter optimization."
             )
 
+        if self.storage is None:
+            warnings.warn(
+                "No `--storage` passed, the trials are only kept in memory and are lost if the optimization is interrupted. "
+                "Use e.g. `--storage sqlite:///logs/optuna.db` to be able to resume the study."
+            )
+
         if self.tensorboard_log is not None:
             warnings.warn("Tensorboard log is deactivated when running hyperparameter optimization")
             self.tensorboard_log = None
@@ -850,10 +861,15 @@ class ExperimentManager:
         if self.verbose > 0:
             print(f"Sampler: {self.sampler} - Pruner: {self.pruner}")
 
+        storage: Optional[Union[str, JournalStorage]] = self.storage
+        # use a journal file for storing the trials when no database is used, e.g. on NFS
+        if self.storage is not None and self.storage.endswith(".log"):
+            storage = JournalStorage(JournalFileBackend(self.storage))
+
         study = optuna.create_study(
             sampler=sampler,
             pruner=pruner,
-            storage=self.storage,
+            storage=storage,
             study_name=self.study_name,
             load_if_exists=True,
             direction="maximize",
@@ -1,118 +1,384 @@
-from typing import Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, Optional, Union
 
 import numpy as np
 import optuna
+from optuna.samplers import TPESampler
 from stable_baselines3.common.noise import NormalActionNoise, OrnsteinUhlenbeckActionNoise
 from torch import nn as nn
 
 from rl_zoo3 import linear_schedule
 
+# timesteps between two intermediate values (mean reward of the TrialEvalCallback) reported to the pruner
+PRUNER_REPORT_EVERY_STEPS = int(1e5)
+
+# choices shared by the samplers, defined once instead of on every trial
+_BATCH_SIZES = (4, 8, 16, 32, 64, 128, 256, 512)
+_N_STEPS = (4, 8, 16, 32, 64, 128, 256, 512, 1024)
+# discount factors used for Pong (PPO, A2C, DQN)
+_GAMMAS = (0.8, 0.85, 0.9, 0.95, 0.98, 0.99, 0.995, 0.999, 0.9999)
+_GAE_LAMBDAS = (0.8, 0.85, 0.9, 0.92, 0.95, 0.98, 0.99, 1.0)
+_MAX_GRAD_NORMS = (0.3, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+# the batch size is derived from n_steps // n_minibatches, so it never is larger than n_steps
+_N_MINIBATCHES = (1, 2, 4, 8, 16, 32, 64)
+
+_TRPO_BATCH_SIZES = (8, 16, 32, 64, 128, 256, 512)
+_TRPO_N_STEPS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+
+# discount factors used by TRPO, SAC, TD3 and DDPG
+_GAMMAS_NARROW = (0.9, 0.95, 0.98, 0.99, 0.995, 0.999, 0.9999)
+
+# choices of the off-policy samplers (SAC, TD3, DDPG)
+_OFF_POLICY_BUFFER_SIZES = (int(1e4), int(1e5), int(1e6))
+_OFF_POLICY_TRAIN_FREQS = (1, 4, 8, 16, 32, 64, 128, 256, 512)
+_TAUS = (0.001, 0.005, 0.01, 0.02, 0.05, 0.08)
+
+_DQN_TRAIN_FREQS = (1, 4, 8, 16, 128, 256, 1000)
+_DQN_SUBSAMPLE_STEPS = (1, 2, 4, 8)
+# gradient steps of all (train_freq, subsample_steps) combinations
+_DQN_GRAD_STEPS = MappingProxyType(
+    {
+        (train_freq, subsample_steps): max(train_freq // subsample_steps, 1)
+        for train_freq in _DQN_TRAIN_FREQS
+        for subsample_steps in _DQN_SUBSAMPLE_STEPS
+    }
+)
+
+# read-only, shared by all samplers using an activation function
+_ACTIVATION_FN_MAP = MappingProxyType(
+    {
+        "sigmoid": nn.Sigmoid,
+        "tanh": nn.Tanh,
+        "relu": nn.ReLU,
+        "elu": nn.ELU,
+        "leaky_relu": nn.LeakyReLU,
+    }
+)
+_ACTIVATION_FN_NAMES = tuple(_ACTIVATION_FN_MAP)
 
-def sample_ppo_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
-    """
-    Sampler for PPO hyperparams. Adapted for Pong hyperparameter optimization.
+# Independent networks usually work best
+# when not working with images
+_NET_ARCH_PPO = MappingProxyType(
+    {
+        "identity": None,
+        "small": {"pi": (64,), "vf": (64,)},
+        "medium": {"pi": (64, 64), "vf": (64, 64)},
+        "medium_pi": {"pi": (64,), "vf": (64, 64)},
+        "medium_vf": {"pi": (64, 64), "vf": (64,)},
+        "large": {"pi": (256, 256), "vf": (256, 256)},
+    }
+)
+_NET_ARCH_TRPO = MappingProxyType(
+    {
+        "small": {"pi": (64, 64), "vf": (64, 64)},
+        "medium": {"pi": (256, 256), "vf": (256, 256)},
+    }
+)
+_NET_ARCH_OFF_POLICY = MappingProxyType(
+    {
+        "small": (64, 64),
+        "medium": (256, 256),
+        "big": (400, 300),
+        # Uncomment for tuning HER
+        # "large": (256, 256, 256),
+        # "verybig": (512, 512, 512),
+    }
+)
+_NET_ARCH_DQN = MappingProxyType(
+    {
+        "identity": None,
+        "small": (64,),
+        "medium": (64, 64),
+        "large": (256, 256),
+    }
+)
 
-    :param trial:
-    :return:
-    """
+# Schemas of the hyperparams sampled directly with the trial: (name, kind, args)
+# kind "cat": categorical choices, "float"/"float_log": (low, high) of a (log) uniform float
+_PPO_SCHEMA = (
+    # specifies number of steps for each env per update -> thereby specifies rollout buffer which is n_steps * n_envs
+    # is the number of experiences collected from a SINGLE environment once its next update is performed
+    # must be greater or equal to the batch_size
+    ("n_steps", "cat", _N_STEPS),
     # batch size should be hyperparam - specifies the minibatch size, so the subset of
     # batch/buffer with random shuffling, those that are sampled from the collected experiences
-    # must be smaller or equal to the n_steps
+    # must be smaller or equal to the n_steps, so it is n_steps // n_minibatches clamped to _BATCH_SIZES
     # TODO recommendet to use batch_size that is a factor of n_steps * n_envs
     # so the rollout buffer size (n_steps * n_envs) should be a multiple of the mini-batch size
-    batch_size = trial.suggest_categorical("batch_size", [4, 8, 16, 32, 64, 128, 256, 512])
-    
-    # specifies number of steps for each env per update -> thereby specifies rollout buffer which is n_steps * n_envs
-    # is the number of experiences collected from a SINGLE environment once its next update is performed
-    # must be greater or equal to the batch_size
-    n_steps = trial.suggest_categorical("n_steps", [4, 8, 16, 32, 64, 128, 256, 512, 1024])
-    
+    ("n_minibatches", "cat", _N_MINIBATCHES),
     # discount factor gamma
-    gamma = trial.suggest_categorical("gamma", [0.8, 0.85, 0.9, 0.95, 0.98, 0.99, 0.995, 0.999, 0.9999])
-    
-    # starting learning rate 
-    learning_rate = trial.suggest_float("learning_rate", 1e-5, 1, log=True)
-    
+    ("gamma", "cat", _GAMMAS),
+    # starting learning rate
+    ("learning_rate", "float_log", (1e-5, 1)),
     # entropy coefficient for controlong weight of the entropy term in the loss function
-    ent_coef = trial.suggest_float("ent_coef", 0.00000001, 0.05, log=True)
-    
+    ("ent_coef", "float_log", (0.00000001, 0.05)),
     # clip range for limiting changes to the policy during optimization
-    clip_range = trial.suggest_categorical("clip_range", [0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4])
-    
+    ("clip_range", "cat", (0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4)),
     # how often each of data fro rollout buffer is used to perform gradient updates
-    n_epochs = trial.suggest_categorical("n_epochs", [1, 3, 5, 7, 10, 15, 20])
-    
+    ("n_epochs", "cat", (1, 3, 5, 7, 10, 15, 20)),
     # for trade-off between bias and variance in advantage estimates
-    gae_lambda = trial.suggest_categorical("gae_lambda", [0.8, 0.85, 0.9, 0.92, 0.95, 0.98, 0.99, 1.0])
-    
+    ("gae_lambda", "cat", _GAE_LAMBDAS),
     # used to clip gradients during optmization step
-    max_grad_norm = trial.suggest_categorical("max_grad_norm", [0.3, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0])
-    
+    ("max_grad_norm", "cat", _MAX_GRAD_NORMS),
     # value function coefficient
-    vf_coef = trial.suggest_float("vf_coef", 0.1, 1)
-    
+    ("vf_coef", "float", (0.1, 1)),
     # net architecture
-    net_arch_type = trial.suggest_categorical("net_arch", ["identity", "small", "medium", "medium_pi", "medium_vf", "large"])
-    
+    ("net_arch", "cat", tuple(_NET_ARCH_PPO)),
     # orthogonal initialization
-    ortho_init = trial.suggest_categorical('ortho_init', [False, True])
-    
-    # different activation functions for the policy network 
-    activation_fn_name = trial.suggest_categorical("activation_fn", ["sigmoid", "tanh", "relu", "elu", "leaky_relu"])
-    
-    
-    # lr_schedule = "constant"
-    # Uncomment to enable learning rate schedule
-    # TODO perhaps it is an idea to use learning rate scheduling to have adaptive learning rates
-    # linear decaay reduces leraning rate gradually over time
-    # or using Adam Optimizer (defuault ???)
-    
-    # lr_schedule = trial.suggest_categorical('lr_schedule', ['linear', 'constant'])
-    # if lr_schedule == "linear":
-    #     learning_rate = linear_schedule(learning_rate)
-    
-
-    # TODO: account when using multiple envs (buffer size is correct)
-    # check buffer size
-    if batch_size > n_steps:
-        batch_size = n_steps
-        
-    # use CNN policy
-    policy = "CnnPolicy"
+    ("ortho_init", "cat", (False, True)),
+    # different activation functions for the policy network
+    ("activation_fn", "cat", _ACTIVATION_FN_NAMES),
+    # learning rate schedule, linear decay reduces the learning rate gradually over time
+    # TODO or using Adam Optimizer (defuault ???)
+    ("lr_schedule", "cat", ("linear", "constant")),
+)
+
+_A2C_SCHEMA = (
+    # discount factor gamma
+    ("gamma", "cat", _GAMMAS),
+    # used to clip gradients during optmization step
+    ("max_grad_norm", "cat", _MAX_GRAD_NORMS),
+    # Toggle PyTorch RMS Prop (different from TF one, cf doc) - rmsprop-True or Adam optimizer-False
+    # could also add the hyperparameter rms_prop_eps, but only if RMSProp is being selected
+    ("use_rms_prop", "cat", (False, True)),
+    # for trade-off between bias and variance in advantage estimates
+    ("gae_lambda", "cat", _GAE_LAMBDAS),
+    # specifies number of steps for each env per update -> thereby specifies rollout buffer which is n_steps * n_envs
+    # is the number of experiences collected from a SINGLE environment once its next update is performed
+    ("n_steps", "cat", _N_STEPS),
+    # starting learning rate
+    ("learning_rate", "float_log", (1e-5, 1)),
+    # entropy coefficient for controlong weight of the entropy term in the loss function
+    ("ent_coef", "float_log", (0.00000001, 0.05)),
+    # value function coefficient
+    ("vf_coef", "float", (0.1, 1)),
+    # learning rate schedule, linear decay reduces the learning rate gradually over time
+    ("lr_schedule", "cat", ("linear", "constant")),
+    # orthogonal initialization
+    ("ortho_init", "cat", (False, True)),
+    # net architecture
+    ("net_arch", "cat", tuple(_NET_ARCH_PPO)),
+    # ("sde_net_arch", "cat", (None, "tiny", "small")),
+    # ("full_std", "cat", (False, True)),
+    # different activation functions for the policy network
+    ("activation_fn", "cat", _ACTIVATION_FN_NAMES),
+)
+
+_TRPO_SCHEMA = (
+    ("n_steps", "cat", _TRPO_N_STEPS),
+    # TODO: account when using multiple envs
+    # batch_size is n_steps // n_minibatches clamped to _TRPO_BATCH_SIZES
+    ("n_minibatches", "cat", _N_MINIBATCHES),
+    ("gamma", "cat", _GAMMAS_NARROW),
+    ("learning_rate", "float_log", (1e-5, 1)),
+    # ("line_search_shrinking_factor", "cat", (0.6, 0.7, 0.8, 0.9)),
+    ("n_critic_updates", "cat", (5, 10, 20, 25, 30)),
+    ("cg_max_steps", "cat", (5, 10, 20, 25, 30)),
+    # ("cg_damping", "cat", (0.5, 0.2, 0.1, 0.05, 0.01)),
+    ("target_kl", "cat", (0.1, 0.05, 0.03, 0.02, 0.01, 0.005, 0.001)),
+    ("gae_lambda", "cat", (0.8, 0.9, 0.92, 0.95, 0.98, 0.99, 1.0)),
+    ("net_arch", "cat", tuple(_NET_ARCH_TRPO)),
+    # Uncomment for gSDE (continuous actions)
+    # ("log_std_init", "float", (-4, 1)),
+    # ("sde_sample_freq", "cat", (-1, 8, 16, 32, 64, 128, 256)),
+    # Orthogonal initialization is disabled
+    # ("ortho_init", "cat", (False, True)),
+    # ("activation_fn", "cat", ("tanh", "relu", "elu", "leaky_relu")),
+    ("activation_fn", "cat", ("tanh", "relu")),
+    ("lr_schedule", "cat", ("linear", "constant")),
+)
+
+_SAC_SCHEMA = (
+    ("gamma", "cat", _GAMMAS_NARROW),
+    ("learning_rate", "float_log", (1e-5, 1)),
+    ("batch_size", "cat", (16, 32, 64, 128, 256, 512, 1024, 2048)),
+    ("buffer_size", "cat", _OFF_POLICY_BUFFER_SIZES),
+    ("learning_starts", "cat", (0, 1000, 10000, 20000)),
+    # ("train_freq", "cat", (1, 10, 100, 300)),
+    ("train_freq", "cat", _OFF_POLICY_TRAIN_FREQS),
+    # Polyak coeff
+    ("tau", "cat", _TAUS),
+    # gradient_steps takes too much time
+    # ("gradient_steps", "cat", (1, 100, 300)),
+    # ("ent_coef", "cat", ("auto", 0.5, 0.1, 0.05, 0.01, 0.0001)),
+    # You can comment that out when not using gSDE
+    ("log_std_init", "float", (-4, 1)),
+    # NOTE: Add "verybig" to net_arch when tuning HER
+    ("net_arch", "cat", tuple(_NET_ARCH_OFF_POLICY)),
+    # ("activation_fn", "cat", ("tanh", "relu", "elu", "leaky_relu")),
+)
+
+# shared by TD3 and DDPG
+_TD3_SCHEMA = (
+    ("gamma", "cat", _GAMMAS_NARROW),
+    ("learning_rate", "float_log", (1e-5, 1)),
+    ("batch_size", "cat", (16, 32, 64, 100, 128, 256, 512, 1024, 2048)),
+    ("buffer_size", "cat", _OFF_POLICY_BUFFER_SIZES),
+    # Polyak coeff
+    ("tau", "cat", _TAUS),
+    ("train_freq", "cat", _OFF_POLICY_TRAIN_FREQS),
+    ("noise_type", "cat", ("ornstein-uhlenbeck", "normal", None)),
+    ("noise_std", "float", (0, 1)),
+    # NOTE: Add "verybig" to net_arch when tuning HER
+    ("net_arch", "cat", tuple(_NET_ARCH_OFF_POLICY)),
+    # ("activation_fn", "cat", ("tanh", "relu", "elu", "leaky_relu")),
+)
 
-    # Independent networks usually work best
-    # when not working with images
-    # for CnnPolicy this defines the FFNN after the CNN
-    net_arch = {
-        "identity": None,
-        "small": dict(pi=[64], vf=[64]),
-        "medium": dict(pi=[64, 64], vf=[64, 64]),
-        "medium_pi": dict(pi=[64], vf=[64, 64]),
-        "medium_vf": dict(pi=[64, 64], vf=[64]),
-        "large": dict(pi=[256, 256], vf=[256, 256]),
-    }[net_arch_type]
+_DQN_SCHEMA = (
+    # discount factor gamma
+    ("gamma", "cat", _GAMMAS),
+    # starting learning rate
+    ("learning_rate", "float_log", (1e-5, 1)),
+    # batch size should be hyperparam - specifies the minibatch size, so the subset of
+    # batch/buffer with random shuffling, those that are sampled from the replay buffer
+    # TODO recommendet to use batch_size that is a factor of n_steps * n_envs
+    ("batch_size", "cat", _BATCH_SIZES),
+    # specifies buffer size which refers to the maximum number of transitions stored in the replay buffer
+    ("buffer_size", "cat", (int(1e4), int(5e4), int(1e5), int(5e5), int(1e6))),
+    # controls final value of epsiolon in the epsilon-greedy exploration strategy
+    # determines the minimum probability of selecting a random action rather than the action
+    # predicted by the policy
+    # TODO should check what is the default starting value for eps (inital)
+    ("exploration_final_eps", "float", (0.01, 0.2)),
+    # fraction over entire training period over which the exploration rate is reducted
+    # basically controls how quickly epiolon decaas from its initial state (exploration initi)
+    # to its final value
+    # specifies fraction of total time steps during which this decay occurs
+    ("exploration_fraction", "float", (0.1, 0.5)),
+    # specified how often the target network is updated every -- steps
+    ("target_update_interval", "cat", (1000, 5000, 10000, 15000, 20000, 50000)),
+    # how many steps of the model to collect transitions for before learning starts
+    # this means before updating Q-values (so basically before it only collects experiences
+    # and stores them in the replay buffer but does not perform gradient updates)
+    ("learning_starts", "cat", (1000, 2000, 5000, 10000, 20000, 50000)),
+    # update the model every train_freq steps
+    # basically how often the agent should update its Q-network- so frequency of gradient updates
+    ("train_freq", "cat", _DQN_TRAIN_FREQS),
+    # used to derive the gradient_steps from the train_freq
+    ("subsample_steps", "cat", _DQN_SUBSAMPLE_STEPS),
+    # net architecture
+    ("net_arch", "cat", tuple(_NET_ARCH_DQN)),
+    # different activation functions for the policy network
+    ("activation_fn", "cat", _ACTIVATION_FN_NAMES),
+    # TODO orthogonal initialization not possible using DQN policy
+    # ("ortho_init", "cat", (False, True)),
+)
+
+# suggest function of each kind of schema entry
+_SUGGEST = MappingProxyType(
+    {
+        "cat": lambda trial, name, choices: trial.suggest_categorical(name, choices),
+        "float": lambda trial, name, bounds: trial.suggest_float(name, *bounds),
+        "float_log": lambda trial, name, bounds: trial.suggest_float(name, *bounds, log=True),
+    }
+)
 
-    # activation function used
-    activation_fn = {"sigmoid": nn.Sigmoid, "tanh": nn.Tanh, "relu": nn.ReLU, "elu": nn.ELU, "leaky_relu": nn.LeakyReLU}[activation_fn_name]
 
-    return {
-        "n_steps": n_steps,
-        "batch_size": batch_size,
-        "gamma": gamma,
-        "learning_rate": learning_rate,
-        "ent_coef": ent_coef,
-        "clip_range": clip_range,
-        "n_epochs": n_epochs,
-        "gae_lambda": gae_lambda,
-        "max_grad_norm": max_grad_norm,
-        "vf_coef": vf_coef,
-        "policy": policy,
-        "policy_kwargs": dict(
-            net_arch=net_arch,
-            activation_fn=activation_fn,
-            ortho_init=ortho_init,
-        ),
-    }
+def _net_arch_to_list(net_arch: Optional[Union[tuple, dict[str, tuple]]]) -> Optional[Union[list, dict[str, list]]]:
+    """
+    Convert a net_arch constant to the lists expected by SB3.
+    New objects are returned, so the constants are never shared with a model.
+
+    :param net_arch:
+    :return:
+    """
+    if net_arch is None:
+        return None
+    if isinstance(net_arch, dict):
+        return {key: list(layers) for key, layers in net_arch.items()}
+    return list(net_arch)
+
+
+@lru_cache(maxsize=8)
+def _zeros(n_actions: int) -> np.ndarray:
+    """
+    Read-only zero mean for the action noise, shared between trials
+    (the noise classes of SB3 only read the mean).
+
+    :param n_actions:
+    :return:
+    """
+    mean = np.zeros(n_actions)
+    mean.setflags(write=False)
+    return mean
+
+
+def _batch_size_from_minibatches(hyperparams: dict[str, Any], batch_sizes: tuple[int, ...]) -> None:
+    """
+    Replace the sampled n_minibatches by the batch size n_steps // n_minibatches,
+    clamped to the range of batch_sizes. The smallest batch size is not larger than
+    the smallest n_steps, so every sampled combination is valid.
+
+    :param hyperparams: sampled from the schema
+    :param batch_sizes: all possible batch sizes
+    """
+    batch_size = hyperparams["n_steps"] // hyperparams.pop("n_minibatches")
+    hyperparams["batch_size"] = min(max(batch_size, batch_sizes[0]), batch_sizes[-1])
+
+
+def make_sampler(n_startup_trials: int = 10, seed: Optional[int] = None) -> TPESampler:
+    """
+    Create the TPE sampler used by the optimization with --sampler tpe.
+    Using multivariate TPE because the sampled hyperparameters of an algorithm are dependent,
+    constant_liar avoids that parallel jobs (n_jobs > 1) sample the same configuration.
+    The intersection search space of the finished trials is not cached, Optuna recomputes it
+    on every trial. Multivariate TPE only models the parameters sampled in every trial,
+    so the samplers use fixed parameter names and choices.
+
+    :param n_startup_trials: number of random trials before using TPE
+    :param seed: seed of the sampler
+    :return:
+    """
+    return TPESampler(n_startup_trials=n_startup_trials, seed=seed, multivariate=True, constant_liar=True)
+
+
+def _sample_from_schema(trial: optuna.Trial, schema: tuple[tuple[str, str, tuple], ...]) -> dict[str, Any]:
+    """
+    Sample all hyperparams of a schema, the name of the hyperparam is used for the trial.
+
+    :param trial:
+    :param schema: entries (name, kind, args), see _PPO_SCHEMA
+    :return:
+    """
+    return {name: _SUGGEST[kind](trial, name, args) for name, kind, args in schema}
+
+
+def _on_policy_tail(hyperparams: dict[str, Any], net_archs: Mapping[str, Any]) -> dict[str, Any]:
+    """
+    Replace the sampled lr_schedule, net_arch, activation_fn and ortho_init (PPO, A2C, TRPO)
+    by the learning rate schedule and the policy_kwargs.
+
+    :param hyperparams: sampled from the schema
+    :param net_archs: net_arch constant of the algorithm
+    :return:
+    """
+    if hyperparams.pop("lr_schedule") == "linear":
+        hyperparams["learning_rate"] = linear_schedule(hyperparams["learning_rate"])
+
+    hyperparams["policy_kwargs"] = dict(
+        net_arch=_net_arch_to_list(net_archs[hyperparams.pop("net_arch")]),
+        activation_fn=_ACTIVATION_FN_MAP[hyperparams.pop("activation_fn")],
+        ortho_init=hyperparams.pop("ortho_init", False),
+    )
+    return hyperparams
+
+
+def sample_ppo_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
+    """
+    Sampler for PPO hyperparams. Adapted for Pong hyperparameter optimization.
+
+    :param trial:
+    :return:
+    """
+    hyperparams = _sample_from_schema(trial, _PPO_SCHEMA)
+    _batch_size_from_minibatches(hyperparams, _BATCH_SIZES)
+
+    # use CNN policy
+    hyperparams["policy"] = "CnnPolicy"
+
+    # for CnnPolicy net_arch defines the FFNN after the CNN
+    return _on_policy_tail(hyperparams, _NET_ARCH_PPO)
 
 
 def sample_ppo_lstm_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
@@ -144,64 +410,10 @@ def sample_trpo_params(trial: optuna.Trial, n_actions: int, n_envs: int, additio
     :param trial:
     :return:
     """
-    batch_size = trial.suggest_categorical("batch_size", [8, 16, 32, 64, 128, 256, 512])
-    n_steps = trial.suggest_categorical("n_steps", [8, 16, 32, 64, 128, 256, 512, 1024, 2048])
-    gamma = trial.suggest_categorical("gamma", [0.9, 0.95, 0.98, 0.99, 0.995, 0.999, 0.9999])
-    learning_rate = trial.suggest_float("learning_rate", 1e-5, 1, log=True)
-    # line_search_shrinking_factor = trial.suggest_categorical("line_search_shrinking_factor", [0.6, 0.7, 0.8, 0.9])
-    n_critic_updates = trial.suggest_categorical("n_critic_updates", [5, 10, 20, 25, 30])
-    cg_max_steps = trial.suggest_categorical("cg_max_steps", [5, 10, 20, 25, 30])
-    # cg_damping = trial.suggest_categorical("cg_damping", [0.5, 0.2, 0.1, 0.05, 0.01])
-    target_kl = trial.suggest_categorical("target_kl", [0.1, 0.05, 0.03, 0.02, 0.01, 0.005, 0.001])
-    gae_lambda = trial.suggest_categorical("gae_lambda", [0.8, 0.9, 0.92, 0.95, 0.98, 0.99, 1.0])
-    net_arch_type = trial.suggest_categorical("net_arch", ["small", "medium"])
-    # Uncomment for gSDE (continuous actions)
-    # log_std_init = trial.suggest_float("log_std_init", -4, 1)
-    # Uncomment for gSDE (continuous action)
-    # sde_sample_freq = trial.suggest_categorical("sde_sample_freq", [-1, 8, 16, 32, 64, 128, 256])
-    # Orthogonal initialization
-    ortho_init = False
-    # ortho_init = trial.suggest_categorical('ortho_init', [False, True])
-    # activation_fn = trial.suggest_categorical('activation_fn', ['tanh', 'relu', 'elu', 'leaky_relu'])
-    activation_fn_name = trial.suggest_categorical("activation_fn", ["tanh", "relu"])
-    # lr_schedule = "constant"
-    # Uncomment to enable learning rate schedule
-    # lr_schedule = trial.suggest_categorical('lr_schedule', ['linear', 'constant'])
-    # if lr_schedule == "linear":
-    #     learning_rate = linear_schedule(learning_rate)
-
-    # TODO: account when using multiple envs
-    if batch_size > n_steps:
-        batch_size = n_steps
+    hyperparams = _sample_from_schema(trial, _TRPO_SCHEMA)
+    _batch_size_from_minibatches(hyperparams, _TRPO_BATCH_SIZES)
 
-    # Independent networks usually work best
-    # when not working with images
-    net_arch = {
-        "small": dict(pi=[64, 64], vf=[64, 64]),
-        "medium": dict(pi=[256, 256], vf=[256, 256]),
-    }[net_arch_type]
-
-    activation_fn = {"tanh": nn.Tanh, "relu": nn.ReLU, "elu": nn.ELU, "leaky_relu": nn.LeakyReLU}[activation_fn_name]
-
-    return {
-        "n_steps": n_steps,
-        "batch_size": batch_size,
-        "gamma": gamma,
-        # "cg_damping": cg_damping,
-        "cg_max_steps": cg_max_steps,
-        # "line_search_shrinking_factor": line_search_shrinking_factor,
-        "n_critic_updates": n_critic_updates,
-        "target_kl": target_kl,
-        "learning_rate": learning_rate,
-        "gae_lambda": gae_lambda,
-        # "sde_sample_freq": sde_sample_freq,
-        "policy_kwargs": dict(
-            # log_std_init=log_std_init,
-            net_arch=net_arch,
-            activation_fn=activation_fn,
-            ortho_init=ortho_init,
-        ),
-    }
+    return _on_policy_tail(hyperparams, _NET_ARCH_TRPO)
 
 
 def sample_a2c_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
@@ -211,352 +423,149 @@ def sample_a2c_params(trial: optuna.Trial, n_actions: int, n_envs: int, addition
     :param trial:
     :return:
     """
-    
-    # discount factor gamma
-    gamma = trial.suggest_categorical("gamma", [0.8, 0.85, 0.9, 0.95, 0.98, 0.99, 0.995, 0.999, 0.9999])
-    
-    # used to clip gradients during optmization step
-    max_grad_norm = trial.suggest_categorical("max_grad_norm", [0.3, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0])
-    
-    # Toggle PyTorch RMS Prop (different from TF one, cf doc) - rmsprop-True or Adam optimizer-False
-    # could also add the hyperparameter rms_prop_eps, but only if RMSProp is being selected
-    use_rms_prop = trial.suggest_categorical("use_rms_prop", [False, True])
-    
-    # for trade-off between bias and variance in advantage estimates
-    gae_lambda = trial.suggest_categorical("gae_lambda", [0.8, 0.85, 0.9, 0.92, 0.95, 0.98, 0.99, 1.0])
-    
-    # specifies number of steps for each env per update -> thereby specifies rollout buffer which is n_steps * n_envs
-    # is the number of experiences collected from a SINGLE environment once its next update is performed
-    # must be greater or equal to the batch_size
-    n_steps = trial.suggest_categorical("n_steps", [4, 8, 16, 32, 64, 128, 256, 512, 1024])
-    
-    # starting learning rate 
-    learning_rate = trial.suggest_float("learning_rate", 1e-5, 1, log=True)
-    
-    # entropy coefficient for controlong weight of the entropy term in the loss function
-    ent_coef = trial.suggest_float("ent_coef", 0.00000001, 0.05, log=True)
-    
-    # value function coefficient
-    vf_coef = trial.suggest_float("vf_coef", 0.1, 1)
-    
-    # orthogonal initialization
-    ortho_init = trial.suggest_categorical('ortho_init', [False, True])
-    
-    # net architecture
-    net_arch_type = trial.suggest_categorical("net_arch", ["identity", "small", "medium", "medium_pi", "medium_vf", "large"])
-    # sde_net_arch = trial.suggest_categorical("sde_net_arch", [None, "tiny", "small"])
-    # full_std = trial.suggest_categorical("full_std", [False, True])
-    
-    # different activation functions for the policy network 
-    activation_fn_name = trial.suggest_categorical("activation_fn", ["sigmoid", "tanh", "relu", "elu", "leaky_relu"])
-
-    # use CNN policy
-    policy = "CnnPolicy"
-
-    # Independent networks usually work best
-    # when not working with images
-    # for CnnPolicy this defines the FFNN after the CNN
-    net_arch = {
-        "identity": None,
-        "small": dict(pi=[64], vf=[64]),
-        "medium": dict(pi=[64, 64], vf=[64, 64]),
-        "medium_pi": dict(pi=[64], vf=[64, 64]),
-        "medium_vf": dict(pi=[64, 64], vf=[64]),
-        "large": dict(pi=[256, 256], vf=[256, 256]),
-    }[net_arch_type]
-
-    # activation function used
-    activation_fn = {"sigmoid": nn.Sigmoid, "tanh": nn.Tanh, "relu": nn.ReLU, "elu": nn.ELU, "leaky_relu": nn.LeakyReLU}[activation_fn_name]
+    hyperparams = _sample_from_schema(trial, _A2C_SCHEMA)
 
     # use CNN policy
-    policy = "CnnPolicy"
+    hyperparams["policy"] = "CnnPolicy"
 
-    return {
-        "n_steps": n_steps,
-        "gamma": gamma,
-        "gae_lambda": gae_lambda,
-        "learning_rate": learning_rate,
-        "ent_coef": ent_coef,
-        "max_grad_norm": max_grad_norm,
-        "use_rms_prop": use_rms_prop,
-        "vf_coef": vf_coef,
-        "policy": policy,
-        "policy_kwargs": dict(
-            net_arch=net_arch,
-            activation_fn=activation_fn,
-            ortho_init=ortho_init,
-        ),
-    }
+    # for CnnPolicy net_arch defines the FFNN after the CNN
+    return _on_policy_tail(hyperparams, _NET_ARCH_PPO)
 
 
-def sample_sac_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
+def _sample_sac_core(trial: optuna.Trial, extra_policy_kwargs: Optional[dict[str, Any]] = None) -> dict[str, Any]:
     """
-    Sampler for SAC hyperparams.
+    Sample the SAC hyperparams without HER, shared by SAC and TQC.
 
     :param trial:
+    :param extra_policy_kwargs: merged into the policy_kwargs, e.g. n_quantiles for TQC
     :return:
     """
-    gamma = trial.suggest_categorical("gamma", [0.9, 0.95, 0.98, 0.99, 0.995, 0.999, 0.9999])
-    learning_rate = trial.suggest_float("learning_rate", 1e-5, 1, log=True)
-    batch_size = trial.suggest_categorical("batch_size", [16, 32, 64, 128, 256, 512, 1024, 2048])
-    buffer_size = trial.suggest_categorical("buffer_size", [int(1e4), int(1e5), int(1e6)])
-    learning_starts = trial.suggest_categorical("learning_starts", [0, 1000, 10000, 20000])
-    # train_freq = trial.suggest_categorical('train_freq', [1, 10, 100, 300])
-    train_freq = trial.suggest_categorical("train_freq", [1, 4, 8, 16, 32, 64, 128, 256, 512])
-    # Polyak coeff
-    tau = trial.suggest_categorical("tau", [0.001, 0.005, 0.01, 0.02, 0.05, 0.08])
-    # gradient_steps takes too much time
-    # gradient_steps = trial.suggest_categorical('gradient_steps', [1, 100, 300])
-    gradient_steps = train_freq
-    # ent_coef = trial.suggest_categorical('ent_coef', ['auto', 0.5, 0.1, 0.05, 0.01, 0.0001])
-    ent_coef = "auto"
-    # You can comment that out when not using gSDE
-    log_std_init = trial.suggest_float("log_std_init", -4, 1)
-    # NOTE: Add "verybig" to net_arch when tuning HER
-    net_arch_type = trial.suggest_categorical("net_arch", ["small", "medium", "big"])
-    # activation_fn = trial.suggest_categorical('activation_fn', [nn.Tanh, nn.ReLU, nn.ELU, nn.LeakyReLU])
-
-    net_arch = {
-        "small": [64, 64],
-        "medium": [256, 256],
-        "big": [400, 300],
-        # Uncomment for tuning HER
-        # "large": [256, 256, 256],
-        # "verybig": [512, 512, 512],
-    }[net_arch_type]
+    hyperparams = _sample_from_schema(trial, _SAC_SCHEMA)
 
-    target_entropy = "auto"
+    hyperparams["gradient_steps"] = hyperparams["train_freq"]
+    hyperparams["ent_coef"] = "auto"
     # if ent_coef == 'auto':
     #     # target_entropy = trial.suggest_categorical('target_entropy', ['auto', 5, 1, 0, -1, -5, -10, -20, -50])
     #     target_entropy = trial.suggest_float('target_entropy', -10, 10)
-
-    hyperparams = {
-        "gamma": gamma,
-        "learning_rate": learning_rate,
-        "batch_size": batch_size,
-        "buffer_size": buffer_size,
-        "learning_starts": learning_starts,
-        "train_freq": train_freq,
-        "gradient_steps": gradient_steps,
-        "ent_coef": ent_coef,
-        "tau": tau,
-        "target_entropy": target_entropy,
-        "policy_kwargs": dict(log_std_init=log_std_init, net_arch=net_arch),
-    }
-
-    if additional_args["using_her_replay_buffer"]:
-        hyperparams = sample_her_params(trial, hyperparams, additional_args["her_kwargs"])
-
+    hyperparams["target_entropy"] = "auto"
+    hyperparams["policy_kwargs"] = dict(
+        log_std_init=hyperparams.pop("log_std_init"),
+        net_arch=_net_arch_to_list(_NET_ARCH_OFF_POLICY[hyperparams.pop("net_arch")]),
+        **(extra_policy_kwargs or {}),
+    )
     return hyperparams
 
 
-def sample_td3_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
+def sample_sac_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
     """
-    Sampler for TD3 hyperparams.
+    Sampler for SAC hyperparams.
 
     :param trial:
     :return:
     """
-    gamma = trial.suggest_categorical("gamma", [0.9, 0.95, 0.98, 0.99, 0.995, 0.999, 0.9999])
-    learning_rate = trial.suggest_float("learning_rate", 1e-5, 1, log=True)
-    batch_size = trial.suggest_categorical("batch_size", [16, 32, 64, 100, 128, 256, 512, 1024, 2048])
-    buffer_size = trial.suggest_categorical("buffer_size", [int(1e4), int(1e5), int(1e6)])
-    # Polyak coeff
-    tau = trial.suggest_categorical("tau", [0.001, 0.005, 0.01, 0.02, 0.05, 0.08])
+    hyperparams = _sample_sac_core(trial)
 
-    train_freq = trial.suggest_categorical("train_freq", [1, 4, 8, 16, 32, 64, 128, 256, 512])
-    gradient_steps = train_freq
+    if not additional_args.get("using_her_replay_buffer"):
+        return hyperparams
 
-    noise_type = trial.suggest_categorical("noise_type", ["ornstein-uhlenbeck", "normal", None])
-    noise_std = trial.suggest_float("noise_std", 0, 1)
+    return sample_her_params(trial, hyperparams, additional_args["her_kwargs"])
 
-    # NOTE: Add "verybig" to net_arch when tuning HER
-    net_arch_type = trial.suggest_categorical("net_arch", ["small", "medium", "big"])
-    # activation_fn = trial.suggest_categorical('activation_fn', [nn.Tanh, nn.ReLU, nn.ELU, nn.LeakyReLU])
 
-    net_arch = {
-        "small": [64, 64],
-        "medium": [256, 256],
-        "big": [400, 300],
-        # Uncomment for tuning HER
-        # "verybig": [256, 256, 256],
-    }[net_arch_type]
+def _sample_td3_core(trial: optuna.Trial, n_actions: int) -> dict[str, Any]:
+    """
+    Sample the TD3 hyperparams without HER, shared by TD3 and DDPG.
 
-    hyperparams = {
-        "gamma": gamma,
-        "learning_rate": learning_rate,
-        "batch_size": batch_size,
-        "buffer_size": buffer_size,
-        "train_freq": train_freq,
-        "gradient_steps": gradient_steps,
-        "policy_kwargs": dict(net_arch=net_arch),
-        "tau": tau,
-    }
+    :param trial:
+    :param n_actions: size of the action noise
+    :return:
+    """
+    hyperparams = _sample_from_schema(trial, _TD3_SCHEMA)
+
+    hyperparams["gradient_steps"] = hyperparams["train_freq"]
+    hyperparams["policy_kwargs"] = dict(net_arch=_net_arch_to_list(_NET_ARCH_OFF_POLICY[hyperparams.pop("net_arch")]))
 
+    noise_type = hyperparams.pop("noise_type")
+    noise_std = hyperparams.pop("noise_std")
     if noise_type == "normal":
-        hyperparams["action_noise"] = NormalActionNoise(mean=np.zeros(n_actions), sigma=noise_std * np.ones(n_actions))
+        hyperparams["action_noise"] = NormalActionNoise(
+            mean=_zeros(n_actions), sigma=np.full(n_actions, noise_std, dtype=np.float64)
+        )
     elif noise_type == "ornstein-uhlenbeck":
         hyperparams["action_noise"] = OrnsteinUhlenbeckActionNoise(
-            mean=np.zeros(n_actions), sigma=noise_std * np.ones(n_actions)
+            mean=_zeros(n_actions), sigma=np.full(n_actions, noise_std, dtype=np.float64)
         )
 
-    if additional_args["using_her_replay_buffer"]:
-        hyperparams = sample_her_params(trial, hyperparams, additional_args["her_kwargs"])
-
     return hyperparams
 
 
-def sample_ddpg_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
+def sample_td3_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
     """
-    Sampler for DDPG hyperparams.
+    Sampler for TD3 hyperparams.
 
     :param trial:
     :return:
     """
-    gamma = trial.suggest_categorical("gamma", [0.9, 0.95, 0.98, 0.99, 0.995, 0.999, 0.9999])
-    learning_rate = trial.suggest_float("learning_rate", 1e-5, 1, log=True)
-    batch_size = trial.suggest_categorical("batch_size", [16, 32, 64, 100, 128, 256, 512, 1024, 2048])
-    buffer_size = trial.suggest_categorical("buffer_size", [int(1e4), int(1e5), int(1e6)])
-    # Polyak coeff
-    tau = trial.suggest_categorical("tau", [0.001, 0.005, 0.01, 0.02, 0.05, 0.08])
-
-    train_freq = trial.suggest_categorical("train_freq", [1, 4, 8, 16, 32, 64, 128, 256, 512])
-    gradient_steps = train_freq
+    hyperparams = _sample_td3_core(trial, n_actions)
 
-    noise_type = trial.suggest_categorical("noise_type", ["ornstein-uhlenbeck", "normal", None])
-    noise_std = trial.suggest_float("noise_std", 0, 1)
+    if not additional_args.get("using_her_replay_buffer"):
+        return hyperparams
 
-    # NOTE: Add "verybig" to net_arch when tuning HER (see TD3)
-    net_arch_type = trial.suggest_categorical("net_arch", ["small", "medium", "big"])
-    # activation_fn = trial.suggest_categorical('activation_fn', [nn.Tanh, nn.ReLU, nn.ELU, nn.LeakyReLU])
+    return sample_her_params(trial, hyperparams, additional_args["her_kwargs"])
 
-    net_arch = {
-        "small": [64, 64],
-        "medium": [256, 256],
-        "big": [400, 300],
-    }[net_arch_type]
 
-    hyperparams = {
-        "gamma": gamma,
-        "tau": tau,
-        "learning_rate": learning_rate,
-        "batch_size": batch_size,
-        "buffer_size": buffer_size,
-        "train_freq": train_freq,
-        "gradient_steps": gradient_steps,
-        "policy_kwargs": dict(net_arch=net_arch),
-    }
+def sample_ddpg_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
+    """
+    Sampler for DDPG hyperparams, uses the same search space as TD3.
 
-    if noise_type == "normal":
-        hyperparams["action_noise"] = NormalActionNoise(mean=np.zeros(n_actions), sigma=noise_std * np.ones(n_actions))
-    elif noise_type == "ornstein-uhlenbeck":
-        hyperparams["action_noise"] = OrnsteinUhlenbeckActionNoise(
-            mean=np.zeros(n_actions), sigma=noise_std * np.ones(n_actions)
-        )
+    :param trial:
+    :return:
+    """
+    hyperparams = _sample_td3_core(trial, n_actions)
 
-    if additional_args["using_her_replay_buffer"]:
-        hyperparams = sample_her_params(trial, hyperparams, additional_args["her_kwargs"])
+    if not additional_args.get("using_her_replay_buffer"):
+        return hyperparams
 
-    return hyperparams
+    return sample_her_params(trial, hyperparams, additional_args["her_kwargs"])
 
 
-def sample_dqn_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
+def _sample_dqn_core(trial: optuna.Trial, extra_policy_kwargs: Optional[dict[str, Any]] = None) -> dict[str, Any]:
     """
-    Sampler for DQN hyperparams. Adapted for Pong hyperparameter optimization.
+    Sample the DQN hyperparams without HER, shared by DQN and QR-DQN.
+    Adapted for Pong hyperparameter optimization.
 
     :param trial:
+    :param extra_policy_kwargs: merged into the policy_kwargs, e.g. n_quantiles for QR-DQN
     :return:
     """
-    # discount factor gamma
-    gamma = trial.suggest_categorical("gamma", [0.8, 0.85, 0.9, 0.95, 0.98, 0.99, 0.995, 0.999, 0.9999])
-    
-    # starting learning rate 
-    learning_rate = trial.suggest_float("learning_rate", 1e-5, 1, log=True)
-    
-    # batch size should be hyperparam - specifies the minibatch size, so the subset of
-    # batch/buffer with random shuffling, those that are sampled from the collected experiences
-    # must be smaller or equal to the n_steps
-    # TODO recommendet to use batch_size that is a factor of n_steps * n_envs
-    # so the rollout buffer size (n_steps * n_envs) should be a multiple of the mini-batch size
-    batch_size = trial.suggest_categorical("batch_size", [4, 8, 16, 32, 64, 128, 256, 512])
-
-    # specifies buffer size which refers to the maximum number of transitions stored in the replay buffer
-    buffer_size = trial.suggest_categorical("buffer_size", [int(1e4), int(5e4), int(1e5), int(5e5), int(1e6)])
-    
-    # controls final value of epsiolon in the epsilon-greedy exploration strategy
-    # determines the minimum probability of selecting a random action rather than the action
-    # predicted by the policy
-    # TODO should check what is the default starting value for eps (inital)
-    exploration_final_eps = trial.suggest_float("exploration_final_eps", 0.01, 0.2)
-    
-    # fraction over entire training period over which the exploration rate is reducted
-    # basically controls how quickly epiolon decaas from its initial state (exploration initi)
-    # to its final value
-    # specifies fraction of total time steps during which this decay occurs
-    exploration_fraction = trial.suggest_float("exploration_fraction", 0.1, 0.5)
-    
-    # specified how often the target network is updated every -- steps
-    target_update_interval = trial.suggest_categorical("target_update_interval", [1000, 5000, 10000, 15000, 20000, 50000])
-    
-    # how many steps of the model to collect transitions for before learning starts
-    # this means before updating Q-values (so basically before it only collects experiences
-    # and stores them in the replay buffer but does not perform gradient updates)
-    learning_starts = trial.suggest_categorical("learning_starts", [1000, 2000, 5000, 10000, 20000, 50000])
+    hyperparams = _sample_from_schema(trial, _DQN_SCHEMA)
 
-    # update the model every train_freq steps
-    # basically how often the agent should update its Q-network- so frequency of gradient updates
-    train_freq = trial.suggest_categorical("train_freq", [1, 4, 8, 16, 128, 256, 1000])
-    
-    subsample_steps = trial.suggest_categorical("subsample_steps", [1, 2, 4, 8])
     # specifies how many gradient steps to do after each rollout  (if -1 then do as many gradient
     # steps as steps done in the environment during the rollout)
-    gradient_steps = max(train_freq // subsample_steps, 1)
+    hyperparams["gradient_steps"] = _DQN_GRAD_STEPS[(hyperparams["train_freq"], hyperparams.pop("subsample_steps"))]
 
-    # net architecture
-    net_arch_type = trial.suggest_categorical("net_arch", ["identity", "small", "medium", "large"])
-
-    net_arch = {
-        "identity": None,
-        "small": [64],
-        "medium": [64, 64],
-        "large": [256, 256],
-    }[net_arch_type]
-    
-    # different activation functions for the policy network 
-    activation_fn_name = trial.suggest_categorical("activation_fn", ["sigmoid", "tanh", "relu", "elu", "leaky_relu"])
-    
-    # activation function used
-    activation_fn = {"sigmoid": nn.Sigmoid, "tanh": nn.Tanh, "relu": nn.ReLU, "elu": nn.ELU, "leaky_relu": nn.LeakyReLU}[activation_fn_name]
-    
-    # TODO orthogonal initialization not possible using DQN policy
-    # ortho_init = trial.suggest_categorical('ortho_init', [False, True])
-    
     # always use CnnPolicy
-    policy = "CnnPolicy"
-    
+    hyperparams["policy"] = "CnnPolicy"
+    hyperparams["policy_kwargs"] = dict(
+        net_arch=_net_arch_to_list(_NET_ARCH_DQN[hyperparams.pop("net_arch")]),
+        activation_fn=_ACTIVATION_FN_MAP[hyperparams.pop("activation_fn")],
+        **(extra_policy_kwargs or {}),
+    )
+    return hyperparams
 
-    hyperparams = {
-        "gamma": gamma,
-        "learning_rate": learning_rate,
-        "batch_size": batch_size,
-        "buffer_size": buffer_size,
-        "train_freq": train_freq,
-        "gradient_steps": gradient_steps,
-        "exploration_fraction": exploration_fraction,
-        "exploration_final_eps": exploration_final_eps,
-        "target_update_interval": target_update_interval,
-        "learning_starts": learning_starts,
-        "policy": policy,
-        "policy_kwargs": dict(
-            net_arch=net_arch,
-            activation_fn=activation_fn
-        ),
-    }
 
-    if additional_args["using_her_replay_buffer"]:
-        hyperparams = sample_her_params(trial, hyperparams, additional_args["her_kwargs"])
+def sample_dqn_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
+    """
+    Sampler for DQN hyperparams. Adapted for Pong hyperparameter optimization.
 
-    return hyperparams
+    :param trial:
+    :return:
+    """
+    hyperparams = _sample_dqn_core(trial)
+
+    if not additional_args.get("using_her_replay_buffer"):
+        return hyperparams
+
+    return sample_her_params(trial, hyperparams, additional_args["her_kwargs"])
 
 
 def sample_her_params(trial: optuna.Trial, hyperparams: dict[str, Any], her_kwargs: dict[str, Any]) -> dict[str, Any]:
@@ -567,12 +576,11 @@ def sample_her_params(trial: optuna.Trial, hyperparams: dict[str, Any], her_kwar
     :parma hyperparams:
     :return:
     """
-    her_kwargs = her_kwargs.copy()
-    her_kwargs["n_sampled_goal"] = trial.suggest_int("n_sampled_goal", 1, 5)
-    her_kwargs["goal_selection_strategy"] = trial.suggest_categorical(
-        "goal_selection_strategy", ["final", "episode", "future"]
-    )
-    hyperparams["replay_buffer_kwargs"] = her_kwargs
+    hyperparams["replay_buffer_kwargs"] = {
+        **her_kwargs,
+        "n_sampled_goal": trial.suggest_int("n_sampled_goal", 1, 5),
+        "goal_selection_strategy": trial.suggest_categorical("goal_selection_strategy", ["final", "episode", "future"]),
+    }
     return hyperparams
 
 
@@ -583,16 +591,17 @@ def sample_tqc_params(trial: optuna.Trial, n_actions: int, n_envs: int, addition
     :param trial:
     :return:
     """
-    # TQC is SAC + Distributional RL
-    hyperparams = sample_sac_params(trial, n_actions, n_envs, additional_args)
-
     n_quantiles = trial.suggest_int("n_quantiles", 5, 50)
     top_quantiles_to_drop_per_net = trial.suggest_int("top_quantiles_to_drop_per_net", 0, n_quantiles - 1)
 
-    hyperparams["policy_kwargs"].update({"n_quantiles": n_quantiles})
+    # TQC is SAC + Distributional RL
+    hyperparams = _sample_sac_core(trial, {"n_quantiles": n_quantiles})
     hyperparams["top_quantiles_to_drop_per_net"] = top_quantiles_to_drop_per_net
 
-    return hyperparams
+    if not additional_args.get("using_her_replay_buffer"):
+        return hyperparams
+
+    return sample_her_params(trial, hyperparams, additional_args["her_kwargs"])
 
 
 def sample_qrdqn_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
@@ -602,13 +611,15 @@ def sample_qrdqn_params(trial: optuna.Trial, n_actions: int, n_envs: int, additi
     :param trial:
     :return:
     """
-    # TQC is DQN + Distributional RL
-    hyperparams = sample_dqn_params(trial, n_actions, n_envs, additional_args)
-
     n_quantiles = trial.suggest_int("n_quantiles", 5, 200)
-    hyperparams["policy_kwargs"].update({"n_quantiles": n_quantiles})
 
-    return hyperparams
+    # QR-DQN is DQN + Distributional RL
+    hyperparams = _sample_dqn_core(trial, {"n_quantiles": n_quantiles})
+
+    if not additional_args.get("using_her_replay_buffer"):
+        return hyperparams
+
+    return sample_her_params(trial, hyperparams, additional_args["her_kwargs"])
 
 
 def sample_ars_params(trial: optuna.Trial, n_actions: int, n_envs: int, additional_args: dict) -> dict[str, Any]:
@@ -650,16 +661,30 @@ def sample_ars_params(trial: optuna.Trial, n_actions: int, n_envs: int, addition
     }
 
 
-HYPERPARAMS_SAMPLER = {
-    "a2c": sample_a2c_params,
-    "ars": sample_ars_params,
-    "ddpg": sample_ddpg_params,
-    "dqn": sample_dqn_params,
-    "qrdqn": sample_qrdqn_params,
-    "sac": sample_sac_params,
-    "tqc": sample_tqc_params,
-    "ppo": sample_ppo_params,
-    "ppo_lstm": sample_ppo_lstm_params,
-    "td3": sample_td3_params,
-    "trpo": sample_trpo_params,
-}
+# read-only, the samplers are looked up with get_sampler()
+HYPERPARAMS_SAMPLER = MappingProxyType(
+    {
+        "a2c": sample_a2c_params,
+        "ars": sample_ars_params,
+        "ddpg": sample_ddpg_params,
+        "dqn": sample_dqn_params,
+        "qrdqn": sample_qrdqn_params,
+        "sac": sample_sac_params,
+        "tqc": sample_tqc_params,
+        "ppo": sample_ppo_params,
+        "ppo_lstm": sample_ppo_lstm_params,
+        "td3": sample_td3_params,
+        "trpo": sample_trpo_params,
+    }
+)
+
+
+@lru_cache(maxsize=None)
+def get_sampler(algo: str) -> Callable[[optuna.Trial, int, int, dict], dict[str, Any]]:
+    """
+    Get the hyperparameter sampler of an algorithm.
+
+    :param algo: name of the algorithm, e.g. "ppo"
+    :return:
+    """
+    return HYPERPARAMS_SAMPLER[algo]
@@ -89,7 +89,7 @@ def train() -> None:
         help="Pruner to use when optimizing hyperparameters",
         type=str,
         default="median",
-        choices=["halving", "median", "none"],
+        choices=["halving", "median", "hyperband", "none"],
     )
     parser.add_argument("--n-startup-trials", help="Number of trials before using optuna sampler", type=int, default=10)
     parser.add_argument(
@@ -100,7 +100,11 @@ def train() -> None:
         default=None,
     )
     parser.add_argument(
-        "--storage", help="Database storage path if distributed optimization should be used", type=str, default=None
+        "--storage",
+        help="Database storage path (e.g. sqlite:///optuna.db) or journal file (ending with .log) "
+        "for keeping trials when the optimization is interrupted or distributed optimization should be used",
+        type=str,
+        default=None,
     )
     parser.add_argument("--study-name", help="Study name for distributed optimization", type=str, default=None)
     parser.add_argument("--verbose", help="Verbose mode (0: no output, 1: INFO)", default=1, type=int)